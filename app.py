@@ -1,12 +1,25 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import requests
 import datetime
-import altair as alt
 import json
 import os
-import streamlit.components.v1 as components 
+import re
+import hashlib
+import hmac
+import shutil
+import time
+import pickle
+import threading
+import sys
+import types
+import bisect
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
+from loan_engine import LOAN_TYPES, LOAN_HORIZON_MONTHS, LOAN_MAX_MONTHS, PREPAY_STRATEGIES, loan_horizon, project_loan_schedule, simulate_prepayment, build_prepay_scenarios
+
+SCRIPT_T0 = time.perf_counter()
 
 # ---------------------------------------------------------
 # 페이지 기본 설정 (제목 이모지 🚀)
@@ -39,17 +52,17 @@ def inject_pwa_meta():
 
 inject_pwa_meta()
 
-# [핵심] 자동 새로고침 스크립트 (600초 = 10분마다 새로고침)
-components.html(
-    """
-        <script>
-            setTimeout(function(){
-                window.location.reload();
-            }, 600000);
-        </script>
-    """,
-    height=0
-)
+# [핵심] 자동 새로고침 (600초 = 10분마다 전체 화면 다시 실행)
+# 페이지를 새로 불러오면 새 세션이 되어 가구 로그인이 풀리므로, 같은 세션 안에서 다시 실행함
+AUTO_REFRESH_SEC = 600
+
+@st.fragment(run_every=AUTO_REFRESH_SEC)
+def auto_refresh():
+    # 전체 실행 때는 건너뛰고, 타이머로 이 부분만 다시 실행될 때 마지막 전체 실행 후 10분이 지났으면 전체를 다시 실행
+    if time.perf_counter() - SCRIPT_T0 >= AUTO_REFRESH_SEC:
+        st.rerun()
+
+auto_refresh()
 
 col_title, col_time = st.columns([3, 1])
 with col_title:
@@ -57,6 +70,8 @@ with col_title:
 with col_time:
     now_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     st.caption(f"🔄 Last Updated: {now_str}")
+    render_status = st.empty()
+snapshot_notice = st.empty()
 
 # ---------------------------------------------------------
 # [Session State 초기화]
@@ -75,44 +90,262 @@ if 'watch_tickers' not in st.session_state:
 if 'sim_ticker_main' not in st.session_state:
     st.session_state['sim_ticker_main'] = "NVDA"
 
+if 'alert_ladders' not in st.session_state:
+    st.session_state['alert_ladders'] = {}
+if 'alert_custom' not in st.session_state:
+    st.session_state['alert_custom'] = []
+if 'alert_dd_levels' not in st.session_state:
+    st.session_state['alert_dd_levels'] = "20, 30, 50"
+if 'alert_webhook' not in st.session_state:
+    st.session_state['alert_webhook'] = ""
+
+if 'adult_cnt' not in st.session_state:
+    st.session_state['adult_cnt'] = 2
+if 'child_cnt' not in st.session_state:
+    st.session_state['child_cnt'] = 2
+
 # ---------------------------------------------------------
 # [함수] 데이터 가져오기 및 계산
 # ---------------------------------------------------------
-@st.cache_data(ttl=600)
-def get_exchange_rate():
+# yfinance는 무거워서 실제로 시세를 받아올 때(백그라운드 스레드)만 import 합니다.
+def fetch_fx(_key):
     try:
+        import yfinance as yf
         df = yf.Ticker("KRW=X").history(period="5d")
-        if df.empty: return 1400.0, 0.0
-        return df['Close'].iloc[-1], df['Close'].iloc[-1] - df['Close'].iloc[-2]
+        if len(df) < 2: return None
+        return float(df['Close'].iloc[-1]), float(df['Close'].iloc[-1] - df['Close'].iloc[-2])
     except:
-        return 1400.0, 0.0
+        return None
 
-@st.cache_data(ttl=300)
-def get_current_price_only(ticker):
+def fetch_quote(ticker):
+    # 현재가와 전일 종가를 한 번의 요청으로 가져옴
     try:
-        if not ticker: return 0.0
-        df = yf.Ticker(ticker).history(period="1d")
-        if df.empty: return 0.0
-        return df['Close'].iloc[-1]
+        import yfinance as yf
+        df = yf.Ticker(ticker).history(period="5d")
+        if df.empty: return None
+        curr = float(df['Close'].iloc[-1])
+        prev = float(df['Close'].iloc[-2]) if len(df) >= 2 else curr
+        return curr, prev
     except:
-        return 0.0
+        return None
 
-@st.cache_data(ttl=300)
-def get_daily_diff_amount(ticker):
+def fetch_close_history(ticker):
     try:
-        if not ticker: return 0.0
-        df = yf.Ticker(ticker).history(period="5d")
-        if len(df) < 2: return 0.0
-        curr = df['Close'].iloc[-1]
-        prev = df['Close'].iloc[-2]
-        return curr - prev 
+        import yfinance as yf
+        df = yf.Ticker(ticker).history(period="max")
+        if df.empty: return None
+        return df['Close']
     except:
-        return 0.0
+        return None
+
+# ---------------------------------------------------------
+# [캐시] 서버 전체가 공유하는 시세 캐시 (디스크 스냅샷 + 백그라운드 갱신)
+# ---------------------------------------------------------
+MARKET_SNAPSHOT_FILE = "market_snapshot.pkl"
+FX_TTL = 600
+QUOTE_TTL = 300
+HISTORY_TTL = 3600
+SNAPSHOT_INTERVAL = 60  # 시세가 갱신되면 최대 1분에 한 번 스냅샷을 다시 씀
+MARKET_FETCHERS = {"fx": fetch_fx, "quote": fetch_quote, "hist": fetch_close_history}
+
+class MarketCache:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.entries = {}  # (종류, 티커) -> (저장 시각, 값)
+        self.inflight = {}  # (종류, 티커) -> (진행 중인 작업, 화면용 여부)
+        self.listeners = []  # 값이 갱신될 때 fn(종류, 티커) 로 호출할 함수 (알림 엔진)
+        # 화면에 당장 필요한 요청은 워밍업/갱신 대기열(max 히스토리 등) 뒤에서 기다리지 않도록 풀을 나눔
+        self.bg_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-bg")
+        self.fg_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-fg")
+        self.warmup_sec = None
+        self.first_render_sec = None
+        self.from_snapshot = {}  # 아직 새로 받지 못하고 디스크 스냅샷 값 그대로인 항목 -> 스냅샷 값의 시각
+        self.snapshot_saved_at = time.time()
+        self.snapshot_saving = False
+        self.load_snapshot()
+
+    def load_snapshot(self):
+        # 재시작 직후에도 바로 그릴 수 있도록 마지막 시세를 디스크에서 복원 (만료된 값은 백그라운드에서 갱신)
+        if not os.path.exists(MARKET_SNAPSHOT_FILE):
+            return
+        try:
+            with open(MARKET_SNAPSHOT_FILE, "rb") as f:
+                data = pickle.load(f)
+            self.entries.update(data)
+            self.from_snapshot = {k: v[0] for k, v in data.items()}
+        except Exception:
+            pass
+
+    def save_snapshot(self):
+        try:
+            with self.lock:
+                data = {k: v for k, v in self.entries.items() if v[1] is not None}
+            tmp = MARKET_SNAPSHOT_FILE + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f)
+            os.replace(tmp, MARKET_SNAPSHOT_FILE)
+        except Exception:
+            pass
+        finally:
+            with self.lock:
+                self.snapshot_saved_at = time.time()
+                self.snapshot_saving = False
+
+    def schedule_snapshot(self):
+        # 갱신될 때마다 쓰지 않고 SNAPSHOT_INTERVAL 마다 한 번만 백그라운드에서 저장
+        with self.lock:
+            if self.snapshot_saving or time.time() - self.snapshot_saved_at < SNAPSHOT_INTERVAL:
+                return
+            self.snapshot_saving = True
+        threading.Thread(target=self.save_snapshot, daemon=True).start()
+
+    def fetch(self, kind, key):
+        value = MARKET_FETCHERS[kind](key)
+        with self.lock:
+            old = self.entries.get((kind, key))
+            if value is None and old is not None and old[1] is not None:
+                # 받아오기 실패: 이전 값은 유지하고 (스냅샷 값이면 그 표시도 유지) 다음 주기에 다시 시도
+                self.entries[(kind, key)] = (time.time(), old[1])
+                return old[1]
+            self.entries[(kind, key)] = (time.time(), value)
+            self.from_snapshot.pop((kind, key), None)
+        self.schedule_snapshot()
+        for fn in list(self.listeners):
+            fn(kind, key)
+        return value
+
+    def is_live(self, kind, key):
+        # 이번 서버 실행 중에 실제로 받아온 값인지 (스냅샷에서 복원한 값이면 False)
+        with self.lock:
+            return (kind, key) in self.entries and (kind, key) not in self.from_snapshot
+
+    def snapshot_status(self, kind="quote"):
+        # 아직 스냅샷 값으로 보여주는 항목 수와 그중 가장 오래된 값의 나이(초)
+        with self.lock:
+            ages = [time.time() - ts for k, ts in self.from_snapshot.items() if k[0] == kind]
+        return len(ages), max(ages, default=0)
+
+    def peek(self, kind, key):
+        # 네트워크 요청 없이 캐시에 있는 값만 확인
+        with self.lock:
+            hit = self.entries.get((kind, key))
+        return hit[1] if hit else None
+
+    def submit(self, kind, key, urgent=False):
+        # 같은 항목을 이미 받는 중이면 그 작업을 같이 기다림 (중복 요청 방지)
+        # 화면용(urgent) 요청인데 백그라운드 대기열에서 아직 시작 전이면 취소하고 화면용 풀로 옮김
+        with self.lock:
+            running = self.inflight.get((kind, key))
+            if running is not None:
+                fut, fut_urgent = running
+                if not urgent or fut_urgent or not fut.cancel():
+                    return fut
+            fut = (self.fg_pool if urgent else self.bg_pool).submit(self.fetch, kind, key)
+            self.inflight[(kind, key)] = (fut, urgent)
+        fut.add_done_callback(lambda f, k=(kind, key): self._finished(k, f))
+        return fut
+
+    def _finished(self, k, fut):
+        with self.lock:
+            if k in self.inflight and self.inflight[k][0] is fut:
+                del self.inflight[k]
+
+    def refresh_async(self, kind, key):
+        self.submit(kind, key)
+
+    def get(self, kind, key, ttl):
+        # 값이 있으면 (만료됐더라도) 즉시 돌려주고, 만료된 값은 백그라운드에서 갱신
+        with self.lock:
+            hit = self.entries.get((kind, key))
+        if hit is None:
+            return self.submit(kind, key, urgent=True).result()
+        if time.time() - hit[0] > ttl:
+            self.refresh_async(kind, key)
+        return hit[1]
+
+    def ensure(self, kind, keys):
+        # 한 번도 받은 적 없는 항목만 백그라운드로 요청하고 기다리지 않음
+        with self.lock:
+            missing = [k for k in set(keys) if (kind, k) not in self.entries]
+        for k in missing:
+            self.submit(kind, k)
+
+    def prefetch(self, kind, keys, ttl, urgent=True):
+        # 처음 보는 티커는 병렬로 받아오고, 만료된 티커는 백그라운드 갱신만 예약
+        # urgent=False 이면 처음 보는 티커도 백그라운드 풀에서 받음 (알림 엔진 등 화면과 무관한 작업용)
+        now = time.time()
+        with self.lock:
+            missing = [k for k in set(keys) if (kind, k) not in self.entries]
+            stale = [k for k in set(keys) if (kind, k) in self.entries and now - self.entries[(kind, k)][0] > ttl]
+        for k in stale:
+            self.refresh_async(kind, k)
+        wait([self.submit(kind, k, urgent=urgent) for k in missing])
+
+    def clear(self, kinds=("quote", "hist")):
+        with self.lock:
+            for k in [k for k in self.entries if k[0] in kinds]:
+                del self.entries[k]
+
+    def warm_up(self, quote_tickers, history_tickers):
+        t_start = time.perf_counter()
+        jobs = [self.submit("fx", "KRW=X")]
+        jobs += [self.submit("quote", t) for t in quote_tickers]
+        jobs += [self.submit("hist", t) for t in history_tickers]
+        wait(jobs)  # 화면용 풀로 옮겨진(취소된) 작업은 바로 끝난 것으로 처리됨
+        self.save_snapshot()
+        self.warmup_sec = time.perf_counter() - t_start
+
+def split_tickers(ticker_str):
+    return [t.strip().upper() for t in str(ticker_str).split(',') if t.strip()]
+
+def held_tickers(state):
+    # 현재 구성원의 보유 종목 티커 (t_<구성원>_<번호>)
+    members = set(sum(household_members(state), []))
+    return sorted({str(v).strip().upper() for k, v in state.items() if k.startswith("t_") and v and partition_of(k) in members})
+
+def saved_tickers():
+    # 최근 사용한 가구의 저장 파일에서 보유 종목 / 관심 종목 티커 목록을 읽음 (워밍업 대상)
+    quote_t, hist_t = set(), set()
+    for hid in active_households():
+        saved = read_household_data(hid)
+        quote_t.update(held_tickers(saved))
+        if saved.get("sim_ticker_main"):
+            quote_t.add(str(saved["sim_ticker_main"]).strip().upper())
+        hist_t.update(split_tickers(saved.get("core_tickers", "")))
+        hist_t.update(split_tickers(saved.get("watch_tickers", "")))
+    return quote_t, hist_t
+
+@st.cache_resource
+def get_market_cache():
+    # 서버 프로세스당 한 번, 서버 시작 후 첫 요청 때 실행: 스냅샷 복원 후 시세 전체를 백그라운드에서 미리 받아둠
+    # (Streamlit 은 스크립트가 실행될 때만 만들어지므로 첫 방문자는 스냅샷 읽기와 스냅샷에 없는 항목 조회를 기다림)
+    cache = MarketCache()
+    quote_t, hist_t = saved_tickers()
+    threading.Thread(target=cache.warm_up, args=(quote_t, hist_t), daemon=True).start()
+    return cache
+
+def get_exchange_rate():
+    fx = market.get("fx", "KRW=X", FX_TTL)
+    return fx if fx else (1400.0, 0.0)
+
+def get_current_price_only(ticker):
+    if not ticker: return 0.0
+    quote = market.get("quote", ticker.strip().upper(), QUOTE_TTL)
+    return quote[0] if quote else 0.0
+
+def get_daily_diff_amount(ticker):
+    if not ticker: return 0.0
+    quote = market.get("quote", ticker.strip().upper(), QUOTE_TTL)
+    return quote[0] - quote[1] if quote else 0.0
+
+def get_close_history(ticker):
+    return market.get("hist", ticker, HISTORY_TTL)
 
 def calculate_daily_stock_change_total(usd_krw):
     total_diff_krw = 0.0
-    for key in st.session_state:
-        if key.startswith("t_") and len(key.split("_")) >= 3:
+    members = set(sum(household_members(st.session_state), []))
+    for key in list(st.session_state.keys()):
+        if key.startswith("t_") and len(key.split("_")) >= 3 and partition_of(key) in members:
             ticker = st.session_state[key]
             qty_key = key.replace("t_", "q_")
             qty = st.session_state.get(qty_key, 0)
@@ -188,18 +421,470 @@ def calculate_and_render_portfolio(user_key, default_name, usd_krw):
 # ---------------------------------------------------------
 # [핵심] 데이터 저장 및 불러오기 시스템 (히스토리 기능 개선)
 # ---------------------------------------------------------
-DATA_FILE = "stock_dashboard_data.json"
+DATA_FILE = "stock_dashboard_data.json"  # 구버전 단일 저장 파일 (default 가구로 자동 이전)
 HISTORY_FILE = "asset_history.csv"
 
-def load_data():
-    if os.path.exists(DATA_FILE):
+# 가구별 폴더(households/<가구>/) 안에서 공용 항목과 구성원별 항목을 나눠 저장
+# - household.json: 대출, 관심 종목, 시뮬레이터, 알림 등 가구 공용
+# - member_<FA|FB|C1..>.json: 구성원 한 명의 주식/현금/부동산
+HOUSEHOLD_DIR = "households"
+HOUSEHOLD_PART = "household"
+ACTIVE_DAYS = 7  # 최근 N일 안에 저장한 가구만 서버 시작 후 첫 요청 때 미리 준비
+MEMBER_KEY_RE = re.compile(r"F[A-Z]|C\d+")
+INTERNAL_KEYS = {"data_loaded", "hh_id", "hh_saved_digest", "hh_auth"}
+HOUSEHOLD_AUTH_FILE = "auth.json"  # 가구 비밀번호 해시 (세션/파티션에는 절대 읽어오지 않음)
+
+def current_household():
+    # 주소 뒤 ?hh=가구이름 으로 가구 선택 (없으면 default)
+    hid = re.sub(r"[^A-Za-z0-9_-]", "", st.query_params.get("hh", "default"))
+    return hid or "default"
+
+def household_path(hid, name=""):
+    return os.path.join(HOUSEHOLD_DIR, hid, name)
+
+def household_members(state):
+    adults = [f"F{chr(65 + i)}" for i in range(int(state.get("adult_cnt", 2)))]
+    children = [f"C{i + 1}" for i in range(int(state.get("child_cnt", 2)))]
+    return adults, children
+
+def partition_of(key):
+    # t_FA_0, csh_krw_C1 처럼 구성원 키가 들어간 항목은 그 구성원 파티션, 나머지는 가구 공용
+    for token in key.split("_")[1:]:
+        if MEMBER_KEY_RE.fullmatch(token):
+            return token
+    return HOUSEHOLD_PART
+
+def partition_file(hid, part):
+    return household_path(hid, "household.json" if part == HOUSEHOLD_PART else f"member_{part}.json")
+
+def split_partitions(data):
+    parts = {HOUSEHOLD_PART: {}}
+    for key, value in data.items():
+        parts.setdefault(partition_of(key), {})[key] = value
+    return parts
+
+def partition_digest(values):
+    return hashlib.md5(json.dumps(values, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def write_partitions(hid, parts, digests):
+    # 내용이 바뀐 파티션 파일만 다시 씀 (다른 구성원/가구 파일은 건드리지 않음)
+    os.makedirs(household_path(hid), exist_ok=True)
+    new_digests = dict(digests)
+    for part, values in parts.items():
+        digest = partition_digest(values)
+        if digests.get(part) == digest:
+            continue
+        path = partition_file(hid, part)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(values, f, ensure_ascii=False, indent=4, sort_keys=True)
+        os.replace(path + ".tmp", path)
+        new_digests[part] = digest
+    return new_digests
+
+def migrate_legacy_data(hid):
+    # 구버전 단일 파일(stock_dashboard_data.json, asset_history.csv)을 default 가구로 1회 이전
+    if hid != "default" or os.path.exists(partition_file(hid, HOUSEHOLD_PART)) or not os.path.exists(DATA_FILE):
+        return
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        legacy = json.load(f)
+    write_partitions(hid, split_partitions(legacy), {})
+    if os.path.exists(HISTORY_FILE):
+        shutil.copy(HISTORY_FILE, household_path(hid, HISTORY_FILE))
+
+# ---------------------------------------------------------
+# [보안] 가구 비밀번호 (주소만 알아서는 다른 가구 데이터를 읽거나 쓸 수 없도록)
+# ---------------------------------------------------------
+def read_household_auth(hid):
+    try:
+        with open(household_path(hid, HOUSEHOLD_AUTH_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def hash_household_key(key, salt):
+    return hashlib.pbkdf2_hmac("sha256", key.encode("utf-8"), bytes.fromhex(salt), 200000).hex()
+
+def set_household_key(hid, key):
+    salt = os.urandom(16).hex()
+    os.makedirs(household_path(hid), exist_ok=True)
+    path = household_path(hid, HOUSEHOLD_AUTH_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"salt": salt, "hash": hash_household_key(key, salt)}, f)
+    os.replace(path + ".tmp", path)
+
+def check_household_key(hid, key):
+    auth = read_household_auth(hid)
+    if not auth or not key:
+        return False
+    return hmac.compare_digest(auth["hash"], hash_household_key(key, auth["salt"]))
+
+def render_household_login(hid):
+    # 비밀번호가 없는 가구는 처음 설정, 있으면 확인
+    # 설정에는 항상 서버의 HOUSEHOLD_SETUP_KEY 가 필요 (먼저 접속한 사람이 기존 데이터가 있는 가구를 가져가거나 가구를 마구 만들지 못하도록)
+    setup_key = os.environ.get("HOUSEHOLD_SETUP_KEY", "")
+    if read_household_auth(hid) is None:
+        st.subheader(f"🔐 '{hid}' 가구 비밀번호 설정")
+        if not setup_key:
+            st.error("서버에 HOUSEHOLD_SETUP_KEY 가 설정되어 있지 않아 새 가구 비밀번호를 만들 수 없습니다. 서버 관리자에게 문의하세요.")
+            return
+        st.caption("이 가구의 데이터는 비밀번호를 아는 사람만 열 수 있습니다. 비밀번호는 주소에 넣지 말고 이 화면에서만 입력하세요.")
+        with st.form("hh_setup"):
+            pw1 = st.text_input("비밀번호 (6자 이상)", type="password")
+            pw2 = st.text_input("비밀번호 확인", type="password")
+            admin = st.text_input("서버 설정 키", type="password")
+            if st.form_submit_button("설정하고 시작하기", type="primary"):
+                if not hmac.compare_digest(admin.encode("utf-8"), setup_key.encode("utf-8")):
+                    st.error("서버 설정 키가 맞지 않습니다.")
+                elif len(pw1) < 6 or pw1 != pw2:
+                    st.error("비밀번호가 너무 짧거나 서로 다릅니다.")
+                else:
+                    set_household_key(hid, pw1)
+                    st.session_state['hh_auth'] = hid
+                    st.rerun()
+    else:
+        st.subheader(f"🔐 '{hid}' 가구 로그인")
+        with st.form("hh_login"):
+            pw = st.text_input("비밀번호", type="password")
+            if st.form_submit_button("열기", type="primary"):
+                if check_household_key(hid, pw):
+                    st.session_state['hh_auth'] = hid
+                    st.rerun()
+                st.error("비밀번호가 맞지 않습니다.")
+
+def read_partition(hid, part):
+    try:
+        with open(partition_file(hid, part), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def read_household_data(hid):
+    # 요청한 가구의 공용 파일 + 현재 구성원(어른/자녀 수 기준) 파일만 읽음 (다른 가구 파일은 열지 않음)
+    migrate_legacy_data(hid)
+    data = read_partition(hid, HOUSEHOLD_PART)
+    for member in sum(household_members(data), []):
+        data.update(read_partition(hid, member))
+    return data
+
+def archive_removed_members(hid, members):
+    # 어른/자녀 수를 줄여서 빠진 구성원 파일은 archive/ 로 옮김 (지우지 않고 보관)
+    folder = household_path(hid)
+    if not os.path.isdir(folder):
+        return
+    stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    for name in os.listdir(folder):
+        m = re.fullmatch(r"member_(.+)\.json", name)
+        if m and m.group(1) not in members:
+            os.makedirs(household_path(hid, "archive"), exist_ok=True)
+            os.replace(os.path.join(folder, name), household_path(hid, os.path.join("archive", f"member_{m.group(1)}_{stamp}.json")))
+
+def all_households():
+    migrate_legacy_data("default")
+    if not os.path.isdir(HOUSEHOLD_DIR):
+        return []
+    return [hid for hid in sorted(os.listdir(HOUSEHOLD_DIR)) if os.path.isdir(household_path(hid))]
+
+def active_households():
+    # 최근 ACTIVE_DAYS 안에 저장된 가구 목록 (폴더 수정 시각만 확인)
+    cutoff = time.time() - ACTIVE_DAYS * 86400
+    return [hid for hid in all_households() if os.path.getmtime(household_path(hid)) >= cutoff]
+
+# ---------------------------------------------------------
+# [알림] 백그라운드 가격 알림 엔진
+# ---------------------------------------------------------
+ALERT_LOG_FILE = "alert_log.jsonl"  # 가구 폴더 안에 기록
+
+def ladder_levels(start_price, drop_rate, split_cnt):
+    # 물타기 시뮬레이터의 회차별 매수가
+    return [start_price * ((1 - drop_rate/100) ** i) for i in range(int(split_cnt))]
+
+def build_alert_rules(state):
+    # 저장된 사다리 / 와치리스트 하락 구간 / 사용자 규칙을 (티커, 방향, 가격) 규칙 목록으로 변환
+    # state: st.session_state 또는 저장 파일(dict)
+    rules = []
+    for ticker, lad in (state.get('alert_ladders') or {}).items():
+        levels = ladder_levels(lad.get("start_price", 0), lad.get("drop_rate", 5.0), lad.get("split_cnt", 0))
+        for i, level in enumerate(levels):
+            rules.append({"ticker": ticker, "op": "below", "level": level, "source": "사다리", "label": f"{i+1}차 매수가 도달"})
+        if lad.get("target", 0) > 0:
+            rules.append({"ticker": ticker, "op": "above", "level": lad["target"], "source": "사다리", "label": "목표 매도가 도달"})
+
+    dd_levels = [float(x) for x in split_tickers(state.get('alert_dd_levels', "")) if x.replace('.', '', 1).isdigit()]
+    for ticker in split_tickers(state.get('watch_tickers', "")):
+        close = market.peek("hist", ticker)
+        if close is None or len(close) == 0:
+            continue
+        ath = float(close.max())
+        for dd in dd_levels:
+            rules.append({"ticker": ticker, "op": "below", "level": ath * (1 - dd/100), "source": "와치리스트", "label": f"전고점 대비 -{dd:g}%"})
+
+    for rule in state.get('alert_custom') or []:
+        rules.append({"ticker": rule["ticker"], "op": rule["op"], "level": float(rule["price"]), "source": "사용자", "label": f"${float(rule['price']):,.2f} {'이하' if rule['op'] == 'below' else '이상'}"})
+    return [r for r in rules if r["ticker"] and r["level"] > 0]
+
+def log_file_sink(alert):
+    # 기본 알림 수신처: 가구별 로컬 알림 로그 파일 (한 줄에 JSON 하나)
+    os.makedirs(household_path(alert["owner"]), exist_ok=True)
+    with open(household_path(alert["owner"], ALERT_LOG_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+def make_webhook_sink(url, owner):
+    # 추가 수신처: 웹훅 (슬랙/디스코드/텔레그램 봇 등) 으로 POST - 해당 가구 알림만 보냄
+    def sink(alert):
+        if alert["owner"] != owner:
+            return
+        requests.post(url, json={"text": f"🔔 {alert['ticker']} {alert['label']} (${alert['price']:,.2f})", **alert}, timeout=5)
+    return sink
+
+def read_alert_log(owner, limit=50):
+    log_file = household_path(owner, ALERT_LOG_FILE)
+    if not os.path.exists(log_file):
+        return []
+    with open(log_file, "r", encoding="utf-8") as f:
+        lines = collections.deque(f, maxlen=limit)
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
+
+ALERT_SOURCE_KEYS = ('alert_ladders', 'alert_custom', 'alert_dd_levels', 'watch_tickers')
+ALERT_REARM_PCT = 2.0  # 알림이 울린 뒤 기준가에서 이만큼(%) 반대로 벗어나야 다시 울릴 수 있음
+
+def alert_rule_id(rule):
+    return f"{rule['ticker']}|{rule['op']}|{rule['level']:.4f}|{rule['source']}|{rule['label']}"
+
+def alert_state_path(owner):
+    # 가구 폴더 아래 alerts/ 에 둠 (가구 폴더 수정 시각을 건드리지 않도록)
+    return os.path.join(HOUSEHOLD_DIR, owner, "alerts", "state.json")
+
+def runtime_registry():
+    # 스크립트 재실행이나 cache_resource 초기화와 무관하게 프로세스에 하나만 유지되는 저장소
+    return sys.modules.setdefault("stock_dashboard_runtime", types.ModuleType("stock_dashboard_runtime"))
+
+class AlertEngine:
+    # 시세가 갱신될 때마다 모든 규칙을 한 번에 점검 (티커별 정렬 인덱스 + 이진 탐색)
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.RLock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.sources = {}     # 가구 -> 규칙을 만드는 설정값 (사다리/사용자 규칙/하락률/와치리스트)
+        self.rules = {}       # 가구 -> 규칙 목록
+        self.index = {}       # 티커 -> {"below": (정렬된 가격, 규칙), "above": (...)}
+        self.last_price = {}  # 티커 -> 직전 점검 가격 (가구별 state.json 에 저장)
+        self.seen = set()     # 이 프로세스에서 실시간 시세로 한 번이라도 점검한 티커
+        self.pending = {}     # (가구, 규칙 id) -> 새로 추가되어 실시간 가격으로 한 번 확인할 규칙
+        self.fired = {}       # 가구 -> 이미 울려서 다시 무장되기 전인 규칙 id
+        self.saved_state = {}
+        self.rebuild = set()  # 히스토리가 새로 들어와서 규칙을 다시 만들어야 하는 가구
+        self.sinks = {"log": log_file_sink}
+        self.last_check = None
+        self.fired_count = 0
+
+    def load_state(self, owner):
         try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                saved_data = json.load(f)
-                for key, value in saved_data.items():
-                    st.session_state[key] = value
-        except Exception as e:
-            st.error(f"데이터 로드 실패: {e}")
+            with open(alert_state_path(owner), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception:
+            return
+        with self.lock:
+            self.fired[owner] = set(state.get("fired", []))
+            for t, p in state.get("last_price", {}).items():
+                self.last_price.setdefault(t, p)
+            self.saved_state[owner] = state
+
+    def save_state(self):
+        # 가구별로 바뀐 경우에만 기록 (울린 규칙 + 그 가구 티커의 직전 가격)
+        with self.lock:
+            states = {}
+            for owner, rules in self.rules.items():
+                ids = {alert_rule_id(r) for r in rules}
+                tickers = {r["ticker"] for r in rules}
+                states[owner] = {
+                    "fired": sorted(self.fired.get(owner, set()) & ids),
+                    "last_price": {t: self.last_price[t] for t in sorted(tickers) if t in self.last_price},
+                }
+            changed = {o: state for o, state in states.items() if self.saved_state.get(o) != state}
+            self.saved_state.update(changed)
+        for owner, state in changed.items():
+            try:
+                path = alert_state_path(owner)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False, indent=4)
+                os.replace(path + ".tmp", path)
+            except Exception:
+                pass
+
+    def set_source(self, owner, state):
+        # 가구 설정값을 보관하고 규칙을 만듦 (히스토리가 나중에 들어오면 같은 설정으로 다시 만듦)
+        source = json.loads(json.dumps({k: state.get(k) for k in ALERT_SOURCE_KEYS}, ensure_ascii=False))
+        with self.lock:
+            if owner not in self.sources and owner not in self.fired:
+                self.load_state(owner)
+            self.sources[owner] = source
+        if split_tickers(source.get('alert_dd_levels') or ""):
+            # 하락 구간 규칙에 필요한 히스토리가 없으면 요청 (도착하면 on_market_update 가 규칙을 다시 만듦)
+            self.cache.ensure("hist", split_tickers(source.get('watch_tickers') or ""))
+        self.set_rules(owner, build_alert_rules(source))
+
+    def set_rules(self, owner, rules):
+        with self.lock:
+            if self.rules.get(owner) == rules:
+                return
+            old_ids = {alert_rule_id(r) for r in self.rules.get(owner, [])}
+            self.rules[owner] = rules
+            index = {}
+            for o, rs in self.rules.items():
+                for r in rs:
+                    rule = dict(r, owner=o, id=alert_rule_id(r))
+                    index.setdefault(rule["ticker"], {"below": [], "above": []})[rule["op"]].append(rule)
+            for t, sides in index.items():
+                for op, rs in sides.items():
+                    rs.sort(key=lambda r: r["level"])
+                    sides[op] = ([r["level"] for r in rs], rs)
+            self.index = index
+            # 새로 추가된 규칙은 다음 점검 때 현재 가격으로 한 번 확인 (이미 조건을 만족하면 울림)
+            for sides in index.values():
+                for _, rs in sides.values():
+                    self.pending.update({(owner, r["id"]): r for r in rs if r["owner"] == owner and r["id"] not in old_ids})
+        self.wake.set()
+
+    def on_market_update(self, kind, key):
+        # 시세가 오면 점검, 와치리스트 히스토리가 오면 하락 구간 규칙을 다시 만들도록 표시
+        if kind == "hist":
+            with self.lock:
+                owners = {o for o, src in self.sources.items() if key in split_tickers(src.get('watch_tickers') or "")}
+                self.rebuild |= owners
+            if not owners:
+                return
+        self.wake.set()
+
+    def tickers(self):
+        with self.lock:
+            return list(self.index)
+
+    def check(self, quotes):
+        # 직전 가격 -> 현재 가격 사이의 기준가만 이진 탐색으로 찾음 (규칙 수 x 티커 수 만큼 돌지 않음)
+        # 처음 보는 티커는 이미 조건을 만족한 규칙을 한 번 울림 (서버가 꺼져 있던 동안 지나친 기준가 포함)
+        # 울린 규칙은 가격이 ALERT_REARM_PCT 이상 반대로 벗어나야 다시 무장됨 (기준가 근처 등락 시 중복 방지)
+        # 새로 추가된 규칙(서버 시작 시 등록한 규칙 포함)은 실시간 가격을 처음 받은 뒤 처음 보는 티커와 같은 기준으로 한 번 확인
+        h = ALERT_REARM_PCT / 100
+        with self.lock:
+            index = self.index
+        fired = []
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for t, quote in quotes.items():
+            if not quote or t not in index:
+                continue
+            p1 = quote[0]
+            p0 = self.last_price.get(t)
+            self.last_price[t] = p1
+            self.seen.add(t)
+            if p0 == p1:
+                continue
+            b_levels, b_rules = index[t]["below"]
+            a_levels, a_rules = index[t]["above"]
+            if p0 is None:
+                hits = b_rules[bisect.bisect_left(b_levels, p1):][::-1] + a_rules[:bisect.bisect_right(a_levels, p1)]
+                rearm = []
+            elif p1 < p0:
+                hits = b_rules[bisect.bisect_left(b_levels, p1):bisect.bisect_left(b_levels, p0)][::-1]
+                rearm = a_rules[bisect.bisect_left(a_levels, p1 / (1 - h)):bisect.bisect_left(a_levels, p0 / (1 - h))]
+            else:
+                hits = a_rules[bisect.bisect_right(a_levels, p0):bisect.bisect_right(a_levels, p1)]
+                rearm = b_rules[bisect.bisect_right(b_levels, p0 / (1 + h)):bisect.bisect_right(b_levels, p1 / (1 + h))]
+            with self.lock:
+                for r in rearm:
+                    self.fired.get(r["owner"], set()).discard(r["id"])
+                for r in hits:
+                    done = self.fired.setdefault(r["owner"], set())
+                    if r["id"] in done:
+                        continue
+                    done.add(r["id"])
+                    fired.append({"time": now, "owner": r["owner"], "ticker": t, "label": r["label"], "source": r["source"], "level": r["level"], "price": p1})
+        with self.lock:
+            current = {(o, alert_rule_id(r)) for o, rs in self.rules.items() for r in rs}
+            for k in [k for k in self.pending if k not in current]:
+                del self.pending[k]  # 확인하기 전에 지워진 규칙
+            for k, r in [(k, r) for k, r in self.pending.items() if r["ticker"] in self.seen]:
+                del self.pending[k]
+                p = self.last_price[r["ticker"]]
+                done = self.fired.setdefault(r["owner"], set())
+                if r["id"] in done or not ((p <= r["level"]) if r["op"] == "below" else (p >= r["level"])):
+                    continue
+                done.add(r["id"])
+                fired.append({"time": now, "owner": r["owner"], "ticker": r["ticker"], "label": r["label"], "source": r["source"], "level": r["level"], "price": p})
+        for alert in fired:
+            for sink in list(self.sinks.values()):
+                try: sink(alert)
+                except Exception: pass
+        self.fired_count += len(fired)
+        self.last_check = datetime.datetime.now()
+        self.save_state()
+        return fired
+
+    def run(self):
+        # 시세 갱신 신호(또는 QUOTE_TTL 경과)마다 감시 티커 시세를 갱신하고 한 번에 점검
+        while not self.stop_event.is_set():
+            self.wake.wait(timeout=QUOTE_TTL)
+            if self.stop_event.wait(1):  # 같은 갱신 묶음의 시세가 모두 들어오도록 잠깐 대기
+                break
+            self.wake.clear()
+            with self.lock:
+                owners, self.rebuild = self.rebuild, set()
+                sources = {o: self.sources[o] for o in owners if o in self.sources}
+            for owner, source in sources.items():
+                self.set_rules(owner, build_alert_rules(source))
+            tickers = self.tickers()
+            self.cache.prefetch("quote", tickers, QUOTE_TTL, urgent=False)  # 화면용 풀을 차지하지 않음
+            # 스냅샷(예전) 시세는 기준 가격으로 쓰지 않음
+            self.check({t: self.cache.peek("quote", t) for t in tickers if self.cache.is_live("quote", t)})
+
+    def start(self):
+        self.cache.listeners.append(self.on_market_update)
+        threading.Thread(target=self.run, daemon=True, name="alert-engine").start()
+
+    def stop(self):
+        # 엔진이 새로 만들어질 때 이전 엔진의 스레드와 시세 리스너를 정리 (알림 중복 방지)
+        self.stop_event.set()
+        self.wake.set()
+        if self.on_market_update in self.cache.listeners:
+            self.cache.listeners.remove(self.on_market_update)
+
+@st.cache_resource
+def get_alert_engine():
+    # 서버 프로세스당 하나: 저장된 규칙으로 시작해서 UI와 무관하게 계속 감시
+    registry = runtime_registry()
+    old = getattr(registry, "alert_engine", None)
+    if old is not None:
+        old.stop()
+    engine = AlertEngine(market)
+    # 알림은 오래 유지되는 설정이므로 최근 사용 여부와 상관없이 모든 가구를 등록
+    # (알림 설정은 모두 가구 공용 파일 household.json 에 있으므로 그 파일만 읽음)
+    for hid in all_households():
+        saved = read_partition(hid, HOUSEHOLD_PART)
+        if not any(saved.get(k) for k in ('alert_ladders', 'alert_custom', 'alert_webhook')) and not (saved.get('alert_dd_levels') and saved.get('watch_tickers')):
+            continue
+        engine.set_source(hid, saved)
+        if saved.get('alert_webhook'):
+            engine.sinks[("webhook", hid)] = make_webhook_sink(saved['alert_webhook'], hid)
+    engine.start()
+    registry.alert_engine = engine
+    return engine
+
+market = get_market_cache()
+# 알림 엔진은 서버 쪽 household.json 만 읽으므로 가구 로그인 전에 시작 (아무도 로그인하지 않아도 감시)
+alerts = get_alert_engine()
+
+hh_id = current_household()
+history_file = household_path(hh_id, HISTORY_FILE)
+
+def load_data():
+    try:
+        saved_data = read_household_data(hh_id)
+        for key, value in saved_data.items():
+            st.session_state[key] = value
+        st.session_state['hh_saved_digest'] = {part: partition_digest(values) for part, values in split_partitions(saved_data).items()}
+    except Exception as e:
+        st.error(f"데이터 로드 실패: {e}")
 
 # [수정된 함수] 자산 이력 기록 함수 (타입 에러 해결 및 호환성 강화)
 def log_asset_history(total_asset_krw, net_asset_krw):
@@ -213,8 +898,8 @@ def log_asset_history(total_asset_krw, net_asset_krw):
     })
     
     try:
-        if os.path.exists(HISTORY_FILE):
-            df = pd.read_csv(HISTORY_FILE)
+        if os.path.exists(history_file):
+            df = pd.read_csv(history_file)
             
             # -------------------------------------------------------
             # [마이그레이션 & 타입 강제 변환]
@@ -247,16 +932,31 @@ def log_asset_history(total_asset_krw, net_asset_krw):
         else:
             df = new_data
         
-        df.to_csv(HISTORY_FILE, index=False)
+        df.to_csv(history_file, index=False)
     except Exception as e:
         st.error(f"히스토리 저장 실패: {e}")
 
 def save_data():
+    if st.session_state.get('hh_auth') != hh_id:
+        st.error("가구 인증이 필요합니다. 새로고침 후 다시 로그인해주세요.")
+        return
     try:
-        data_to_save = {k: v for k, v in st.session_state.items() if isinstance(v, (int, float, str, bool, dict, list))}
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data_to_save, f, ensure_ascii=False, indent=4)
+        # 현재 구성원이 아닌 사람의 값은 세션에서 지우고, 그 사람의 파일은 보관 폴더로 옮김
+        members = set(sum(household_members(st.session_state), []))
+        for k in [k for k in st.session_state.keys() if partition_of(k) not in members | {HOUSEHOLD_PART}]:
+            del st.session_state[k]
+        archive_removed_members(hh_id, members)
+
+        data_to_save = {k: v for k, v in st.session_state.items() if k not in INTERNAL_KEYS and isinstance(v, (int, float, str, bool, dict, list))}
+        digests = {p: d for p, d in st.session_state.get('hh_saved_digest', {}).items() if p in members | {HOUSEHOLD_PART}}
+        st.session_state['hh_saved_digest'] = write_partitions(hh_id, split_partitions(data_to_save), digests)
         
+        # 재시작 직후 스냅샷(예전) 시세로 계산된 자산은 추세 기록에 남기지 않음
+        if not all(market.is_live("quote", t) for t in held_tickers(st.session_state)) or not market.is_live("fx", "KRW=X"):
+            st.warning("⏳ 시세를 새로 받아오는 중이라 자산 추세는 기록하지 않았습니다. 잠시 후 다시 저장해주세요.")
+            st.toast("✅ 데이터가 저장되었습니다!", icon="💾")
+            return
+
         # [수정] 저장 시 총자산과 순자산을 함께 기록
         current_total = st.session_state.get('total_family_asset', 0.0)
         current_loan = st.session_state.get('total_loan_balance', 0.0)
@@ -267,22 +967,98 @@ def save_data():
     except Exception as e:
         st.error(f"데이터 저장 실패: {e}")
 
+# 같은 세션에서 가구가 바뀌면 이전 가구 값이 섞이지 않도록 세션을 비우고 다시 시작
+if st.session_state.get('hh_id', hh_id) != hh_id:
+    st.session_state.clear()
+    st.rerun()
+
+# 가구 비밀번호 확인: 통과하기 전에는 이 가구의 데이터를 읽지도 쓰지도 않음
+# (예전 안내대로 주소에 넣어 둔 ?key= 는 쓰지 않고 주소에서 지움 - 방문 기록/로그에 비밀번호가 남지 않도록)
+if "key" in st.query_params:
+    del st.query_params["key"]
+if st.session_state.get('hh_auth') != hh_id:
+    render_household_login(hh_id)
+    st.stop()
+
 if 'data_loaded' not in st.session_state:
     load_data()
+    st.session_state['hh_id'] = hh_id
     st.session_state['data_loaded'] = True
 
+# ---------------------------------------------------------
+# [함수] 대출 입력값 (계산 엔진은 loan_engine.py - 모든 대출을 배열 한 번으로 계산)
+# ---------------------------------------------------------
+def collect_loans():
+    # 탭 6 입력값(세션)에서 잔액이 있는 대출만 배열로 모음
+    names, bal, rate, months, kind = [], [], [], [], []
+    for i in range(int(st.session_state.get("l_cnt", 1))):
+        lb = float(st.session_state.get(f"lb_{i}", 100000000 if i == 0 else 0) or 0)
+        if lb <= 0:
+            continue
+        lt = st.session_state.get(f"lt_{i}", LOAN_TYPES[0])
+        names.append(f"{i+1}. {st.session_state.get(f'ln_{i}', '') or '대출'}")
+        bal.append(lb)
+        rate.append(float(st.session_state.get(f"lr_{i}", 4.5) or 0))
+        months.append(min(LOAN_MAX_MONTHS, max(1, int(st.session_state.get(f"lm_{i}", LOAN_HORIZON_MONTHS) or 1))))
+        kind.append(LOAN_TYPES.index(lt) if lt in LOAN_TYPES else 0)
+    return {
+        "name": names,
+        "balance": np.array(bal, dtype=float),
+        "rate": np.array(rate, dtype=float),
+        "months": np.array(months, dtype=float),
+        "kind": np.array(kind, dtype=int),
+    }
+
+def project_loan_balance_path(loans):
+    # 탭 6에서 선택한 추가상환 전략을 반영한 월별 총 대출 잔액 (순자산 전망용)
+    extra = float(st.session_state.get("lp_extra", 0) or 0)
+    strategy = st.session_state.get("lp_strategy", PREPAY_STRATEGIES[0])
+    if len(loans["balance"]) == 0:
+        return np.zeros(loan_horizon(loans))
+    if extra <= 0:
+        bal, _ = project_loan_schedule(loans)
+        return bal.sum(axis=0)
+    e, o, _ = build_prepay_scenarios(loans, [extra], [strategy if strategy in PREPAY_STRATEGIES else PREPAY_STRATEGIES[0]])
+    return simulate_prepayment(loans, e, o)["balance_path"][0]
+
+# ---------------------------------------------------------
+# [성능] 차트는 본문을 다 그린 뒤에 그림 (altair import 가 첫 화면을 막지 않도록)
+# ---------------------------------------------------------
+deferred_charts = []  # (자리표시자, 차트 만드는 함수) - 스크립트가 다시 실행될 때마다 새로 채워짐
+
+def defer_chart(build_chart):
+    deferred_charts.append((st.empty(), build_chart))
+
+@st.cache_resource
+def load_altair():
+    import altair as alt
+    return alt
+
+# ---------------------------------------------------------
+# 사이드바: 가구 설정
+# ---------------------------------------------------------
+with st.sidebar:
+    st.markdown("### 🏠 가구 설정")
+    st.caption(f"현재 가구: **{hh_id}** (주소 뒤에 `?hh=가구이름` 을 붙이면 다른 가구로 전환)")
+    st.number_input("어른 수", min_value=1, max_value=6, step=1, key="adult_cnt")
+    st.number_input("자녀 수", min_value=0, max_value=6, step=1, key="child_cnt")
+    st.caption("구성원별로 파일이 따로 저장되어, 저장 시 바뀐 사람의 파일만 다시 씁니다.")
+
 # ---------------------------------------------------------
 # 메인 화면: 탭 구성
 # ---------------------------------------------------------
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "🎯 목표 달성 현황",
     "📈 주식 분석", 
     "🧮 물타기 시뮬레이터", 
     "💰 가족 자산", 
     "👶 자녀 자산",
-    "🏦 대출 현황"
+    "🏦 대출 현황",
+    "🔔 가격 알림"
 ])
 
+# 보유 종목 시세를 한 번에 병렬로 받아둠 (처음 보는 티커만 대기, 나머지는 캐시/백그라운드 갱신)
+market.prefetch("quote", held_tickers(st.session_state), QUOTE_TTL)
 usd_krw, rate_diff = get_exchange_rate()
 if usd_krw == 0: usd_krw = 1400.0
 
@@ -319,15 +1095,26 @@ with tab1:
     )
     col_goal2.metric("목표 달성률", f"{progress_pct*100:.2f}%")
     col_goal3.metric("남은 금액", f"{target_net_worth - current_net_worth:,.0f}원")
-    
+
+    st.divider()
+
+    # [NEW] 대출 상환 스케줄을 반영한 순자산 전망 (자산은 현재 수준 유지 가정)
+    st.subheader("🔮 대출 상환 반영 순자산 전망")
+    loan_path = project_loan_balance_path(collect_loans())
+    proj_net = total_asset_krw - loan_path
+    proj_cols = st.columns(5)
+    for col, yr in zip(proj_cols, [1, 3, 5, 10, 30]):
+        col.metric(f"{yr}년 후", f"{proj_net[yr * 12 - 1] / 100000000:,.1f}억", delta=f"{proj_net[yr * 12 - 1] - current_net_worth:,.0f}원")
+    st.caption("💡 현재 자산이 그대로라고 가정하고, [대출 현황] 탭의 상환 방식·추가상환 전략만 반영한 값입니다.")
+
     st.divider()
 
     # [NEW] 자산 추세 그래프 영역 (수정 완료)
     st.subheader("📈 내 자산 성장 추세")
-    if os.path.exists(HISTORY_FILE):
+    if os.path.exists(history_file):
         try:
             # 1. 데이터 불러오기
-            df_hist = pd.read_csv(HISTORY_FILE)
+            df_hist = pd.read_csv(history_file)
             
             # 2. 날짜 컬럼을 강제로 '날짜 형식(datetime)'으로 변환 (★핵심 수정★)
             df_hist['Date'] = pd.to_datetime(df_hist['Date'])
@@ -350,36 +1137,39 @@ with tab1:
 
                 # 5. 차트 그리기
                 # X축 설정을 'Date:T'(Temporal)로 명시하여 날짜로 인식시킴
-                base = alt.Chart(df_long).encode(
-                    x=alt.X('Date:T', title='날짜', axis=alt.Axis(format='%Y-%m-%d', tickCount='day')), 
-                    y=alt.Y('Value:Q', title='금액 (원)', axis=alt.Axis(format=",d")),
-                    color=alt.Color('Type:N', title='구분', scale={'domain': ['총 자산', '순자산'], 'range': ['#1f77b4', '#00bfa0']})
-                )
-
-                # 선 그리기
-                line = base.mark_line(interpolate='monotone', size=3)
+                def build_trend_chart(alt, df_long=df_long):
+                    base = alt.Chart(df_long).encode(
+                        x=alt.X('Date:T', title='날짜', axis=alt.Axis(format='%Y-%m-%d', tickCount='day')), 
+                        y=alt.Y('Value:Q', title='금액 (원)', axis=alt.Axis(format=",d")),
+                        color=alt.Color('Type:N', title='구분', scale={'domain': ['총 자산', '순자산'], 'range': ['#1f77b4', '#00bfa0']})
+                    )
+
+                    # 선 그리기
+                    line = base.mark_line(interpolate='monotone', size=3)
                 
-                # 점 그리기 (항상 보이도록 opacity=1로 설정) (★핵심 수정★)
-                points = base.mark_circle(size=80, opacity=1).encode(
-                    tooltip=[
-                        alt.Tooltip('Date:T', title='날짜', format='%Y-%m-%d'),
-                        alt.Tooltip('Type:N', title='구분'),
-                        alt.Tooltip('Value:Q', title='금액', format=",.0f")
-                    ]
-                )
-
-                # 최종 차트 결합
-                chart = (line + points).properties(height=350).configure_axis(
-                    grid=True, # 격자 표시 (보기 편하게)
-                    labelFontSize=12,
-                    titleFontSize=14
-                ).configure_legend(
-                    titleFontSize=14,
-                    labelFontSize=12,
-                    orient='bottom'
-                ).interactive()
-
-                st.altair_chart(chart, use_container_width=True)
+                    # 점 그리기 (항상 보이도록 opacity=1로 설정) (★핵심 수정★)
+                    points = base.mark_circle(size=80, opacity=1).encode(
+                        tooltip=[
+                            alt.Tooltip('Date:T', title='날짜', format='%Y-%m-%d'),
+                            alt.Tooltip('Type:N', title='구분'),
+                            alt.Tooltip('Value:Q', title='금액', format=",.0f")
+                        ]
+                    )
+
+                    # 최종 차트 결합
+                    chart = (line + points).properties(height=350).configure_axis(
+                        grid=True, # 격자 표시 (보기 편하게)
+                        labelFontSize=12,
+                        titleFontSize=14
+                    ).configure_legend(
+                        titleFontSize=14,
+                        labelFontSize=12,
+                        orient='bottom'
+                    ).interactive()
+
+                    return chart
+
+                defer_chart(build_trend_chart)
             else:
                 st.info("데이터 파일은 있지만 내용은 비어있습니다. 다시 저장해주세요.")
         except Exception as e:
@@ -415,17 +1205,19 @@ with tab1:
             col_chart, col_details = st.columns([1.3, 1])
             
             with col_chart:
-                base = alt.Chart(df_chart).encode(theta=alt.Theta("Value", stack=True))
-                pie = base.mark_arc(innerRadius=80, outerRadius=130).encode(
-                    color=alt.Color("Category", scale=alt.Scale(scheme='category10'), legend=None),
-                    order=alt.Order("Value", sort="descending"),
-                    tooltip=["Category", alt.Tooltip("Value", format=",.0f")]
-                )
-                text = base.mark_text(radius=0, size=24, fontWeight='bold', color='black').encode(
-                    text=alt.value(center_text)
-                )
-                chart_combined = alt.layer(pie, text).properties(padding={"top": 10, "bottom": 10, "left": 10, "right": 10})
-                st.altair_chart(chart_combined, use_container_width=True)
+                def build_pie_chart(alt, df_chart=df_chart, center_text=center_text):
+                    base = alt.Chart(df_chart).encode(theta=alt.Theta("Value", stack=True))
+                    pie = base.mark_arc(innerRadius=80, outerRadius=130).encode(
+                        color=alt.Color("Category", scale=alt.Scale(scheme='category10'), legend=None),
+                        order=alt.Order("Value", sort="descending"),
+                        tooltip=["Category", alt.Tooltip("Value", format=",.0f")]
+                    )
+                    text = base.mark_text(radius=0, size=24, fontWeight='bold', color='black').encode(
+                        text=alt.value(center_text)
+                    )
+                    return alt.layer(pie, text).properties(padding={"top": 10, "bottom": 10, "left": 10, "right": 10})
+
+                defer_chart(build_pie_chart)
 
             with col_details:
                 st.markdown("#### 📊 상세 구성")
@@ -463,24 +1255,23 @@ with tab2:
     st.divider()
 
     def analyze_and_display(group_name, ticker_str):
-        t_list = [t.strip().upper() for t in ticker_str.split(',') if t.strip()]
+        t_list = split_tickers(ticker_str)
         if not t_list:
             st.info(f"{group_name}에 입력된 종목이 없습니다.")
             return
 
         result_data = []
-        fixed_period = "max"
+        market.prefetch("hist", t_list, HISTORY_TTL)
 
         for t in t_list:
             try:
-                stock = yf.Ticker(t)
-                df = stock.history(period=fixed_period)
-                if not df.empty:
-                    curr_price = df['Close'].iloc[-1]
-                    ath_price = df['Close'].max()
+                close = get_close_history(t)
+                if close is not None and not close.empty:
+                    curr_price = close.iloc[-1]
+                    ath_price = close.max()
                     mdd_rate = ((curr_price - ath_price) / ath_price) * 100
-                    if len(df) >= 2:
-                        prev_close = df['Close'].iloc[-2]
+                    if len(close) >= 2:
+                        prev_close = close.iloc[-2]
                         daily_change = ((curr_price - prev_close) / prev_close) * 100
                     else:
                         daily_change = 0.0
@@ -515,7 +1306,7 @@ with tab2:
             st.warning(f"{group_name}: 데이터를 불러올 수 없습니다.")
 
     if st.button("분석 실행 (새로고침)", type="primary", use_container_width=True):
-        st.cache_data.clear() 
+        market.clear()
     with st.spinner("전체 기간(Max) 데이터 분석 중..."):
         analyze_and_display("💎 주력 종목", st.session_state['core_tickers'])
         st.markdown("---") 
@@ -526,16 +1317,6 @@ with tab2:
 # =========================================================
 with tab3:
     st.subheader("🧮 스마트 분할 매수 계산기")
-    def get_data_and_calculate_sim(ticker, period):
-        try:
-            if not ticker: return None, None, None, "티커 입력 필요"
-            stock = yf.Ticker(ticker)
-            df = stock.history(period=period)
-            if df.empty: return None, None, None, "데이터 없음"
-            return df, 0, 0, None
-        except Exception as e:
-            return None, None, None, f"에러: {e}"
-
     col_sim_input1, col_sim_input2 = st.columns([1, 2])
     with col_sim_input1:
         ticker_input = st.text_input("시뮬레이션 할 티커", key="sim_ticker_main").upper()
@@ -544,7 +1325,6 @@ with tab3:
     if not ticker_input:
         st.info("👈 티커를 입력해주세요.")
     else:
-        df, _, _, _ = get_data_and_calculate_sim(ticker_input, "1y")
         with st.expander("📝 설정 (자산 및 전략)", expanded=True):
             col_set1, col_set2, col_set3, col_set4, col_set5 = st.columns(5)
             with col_set1: my_price = st.number_input("내 평단가 ($)", value=0.0, step=0.1, format="%.2f", key="sim_p")
@@ -558,7 +1338,7 @@ with tab3:
         st.markdown(f"### 🚀 {ticker_input} 매수 및 매도 계획")
         c_base1, c_base2 = st.columns(2)
         with c_base1:
-            def_p = df['Close'].iloc[-1] if (df is not None and not df.empty) else 0.0
+            def_p = get_current_price_only(ticker_input)
             start_price = st.number_input("🔵 1회차 매수가 ($)", value=float(def_p), step=0.1, format="%.2f", key="sim_start_p")
         with c_base2:
             target_sell_price = st.number_input("🔴 목표 매도 가격 ($)", value=float(def_p)*1.1, step=0.1, format="%.2f", key="sim_target_p")
@@ -582,9 +1362,8 @@ with tab3:
         accum_amt = my_price * my_qty
         rem_cash = my_cash
         
-        for i in range(split_cnt):
+        for i, tgt_p in enumerate(ladder_levels(start_price, drop_rate, split_cnt)):
             cur_drop = i * drop_rate
-            tgt_p = start_price * ((1 - drop_rate/100) ** i)
             tgt_q = int(budget_per_round // tgt_p) if tgt_p > 0 else 0
             inv = tgt_p * tgt_q
             accum_qty += tgt_q
@@ -612,6 +1391,14 @@ with tab3:
         if rem_cash < 0: st.error(f"⚠️ 예수금이 ${abs(rem_cash):,.2f} 부족합니다.")
         else: st.success(f"✅ 모든 매수 후 남은 예수금: ${rem_cash:,.2f}")
 
+        # [NEW] 이 매수/매도 계획을 가격 알림으로 등록 (저장하기를 눌러야 재시작 후에도 유지)
+        if st.button("🔔 이 계획으로 가격 알림 등록", use_container_width=True):
+            st.session_state['alert_ladders'][ticker_input] = {
+                "start_price": start_price, "drop_rate": drop_rate,
+                "split_cnt": int(split_cnt), "target": target_sell_price
+            }
+            st.toast(f"✅ {ticker_input} 매수 {int(split_cnt)}단계 + 목표 매도가 알림이 등록되었습니다.", icon="🔔")
+
 # =========================================================
 # 탭 4: 가족 자산 (부동산 포함) - [수정됨: 저장하기 버튼 추가]
 # =========================================================
@@ -681,15 +1468,16 @@ with tab4:
         
         return stock_krw, cash_group_krw, re_group_krw, daily_diff_sum_krw
 
-    col_a, col_b = st.columns(2)
-    with col_a: s_a, c_a, r_a, diff_a = calculate_family_assets("FA", "가족 1")
-    with col_b: s_b, c_b, r_b, diff_b = calculate_family_assets("FB", "가족 2")
+    adult_keys, child_keys = household_members(st.session_state)
+    member_results = []
+    for i, (col, user_key) in enumerate(zip(st.columns(len(adult_keys)), adult_keys)):
+        with col: member_results.append(calculate_family_assets(user_key, f"가족 {i+1}"))
 
-    tot_s = s_a + s_b
-    tot_c = c_a + c_b
-    tot_r = r_a + r_b
+    tot_s = sum(r[0] for r in member_results)
+    tot_c = sum(r[1] for r in member_results)
+    tot_r = sum(r[2] for r in member_results)
     
-    total_diff_family = diff_a + diff_b
+    total_diff_family = sum(r[3] for r in member_results)
     
     gross_krw = tot_s + tot_c + tot_r
     loan_krw = st.session_state.get('total_loan_balance', 0.0)
@@ -716,9 +1504,11 @@ with tab4:
 # =========================================================
 with tab5:
     st.subheader("👶 자녀 자산 현황")
-    c1, c2 = st.columns(2)
-    with c1: calculate_and_render_portfolio("C1", "자녀 1", usd_krw)
-    with c2: calculate_and_render_portfolio("C2", "자녀 2", usd_krw)
+    if not child_keys:
+        st.info("왼쪽 [가구 설정]에서 자녀 수를 입력해주세요.")
+    else:
+        for i, (col, user_key) in enumerate(zip(st.columns(len(child_keys)), child_keys)):
+            with col: calculate_and_render_portfolio(user_key, f"자녀 {i+1}", usd_krw)
 
 # =========================================================
 # 탭 6: 대출 현황
@@ -731,17 +1521,162 @@ with tab6:
     l_list = []
     for i in range(l_cnt):
         st.markdown(f"**대출 {i+1}**")
-        c1, c2, c3 = st.columns([1.5, 1.5, 1])
+        c1, c2, c3, c4, c5 = st.columns([1.5, 1.5, 1, 1.2, 1])
         with c1: ln = st.text_input("이름", value="담보대출" if i==0 else "", key=f"ln_{i}")
         with c2: lb = st.number_input("잔액 (원)", value=100000000 if i==0 else 0, step=1000000, key=f"lb_{i}")
         with c3: lr = st.number_input("이율 (%)", value=4.5, step=0.1, key=f"lr_{i}")
+        with c4: lt = st.selectbox("상환 방식", LOAN_TYPES, key=f"lt_{i}")
+        with c5: lm = st.number_input("잔여 기간 (개월)", min_value=1, max_value=LOAN_MAX_MONTHS, value=LOAN_HORIZON_MONTHS, step=12, key=f"lm_{i}")
         tot_loan += lb
-        if ln and lb > 0: l_list.append({"이름":ln, "잔액":f"{lb:,.0f}", "이율":f"{lr}%"})
+        if ln and lb > 0: l_list.append({"이름":ln, "잔액":f"{lb:,.0f}", "이율":f"{lr}%", "상환 방식":lt, "잔여 기간":f"{lm}개월"})
     st.session_state['total_loan_balance'] = tot_loan
-    
+
     with smry:
         st.subheader("🏦 총 대출 현황")
         st.markdown(f"<div style='background-color:#fff5f5; padding:15px; border-radius:10px; text-align:center;'><h1>{tot_loan:,.0f}원</h1></div>", unsafe_allow_html=True)
         st.divider()
     if l_list:
-        with st.expander("목록 보기"): st.dataframe(pd.DataFrame(l_list))
\ No newline at end of file
+        with st.expander("목록 보기"): st.dataframe(pd.DataFrame(l_list))
+
+    # [NEW] 상환 스케줄 및 추가상환 시나리오 비교
+    st.divider()
+    st.markdown("### 📉 상환 시뮬레이션 (만기까지, 최대 50년)")
+    loans = collect_loans()
+    if len(loans["balance"]) == 0:
+        st.info("잔액이 있는 대출을 입력하면 상환 스케줄이 계산됩니다.")
+    else:
+        sched_bal, sched_int = project_loan_schedule(loans)
+        base_interest = sched_int.sum()
+        horizon = sched_bal.shape[1]
+
+        # 연 단위로 잘라서 대출별 잔액 누적 그래프
+        year_idx = np.arange(11, horizon, 12)
+        df_sched = pd.DataFrame(sched_bal[:, year_idx].T, columns=loans["name"])
+        df_sched["Year"] = np.arange(1, len(year_idx) + 1)
+        df_sched = df_sched.melt("Year", var_name="Loan", value_name="Balance")
+        defer_chart(lambda alt: alt.Chart(df_sched).mark_area(opacity=0.8).encode(
+            x=alt.X("Year:Q", title="경과 연수"),
+            y=alt.Y("Balance:Q", stack=True, title="잔액 (원)", axis=alt.Axis(format=",d")),
+            color=alt.Color("Loan:N", title="대출"),
+            tooltip=["Year", "Loan", alt.Tooltip("Balance", format=",.0f")]
+        ).properties(height=300))
+
+        c_p1, c_p2 = st.columns(2)
+        with c_p1: extra_monthly = st.number_input("월 추가상환 가능액 (원)", min_value=0, value=0, step=100000, key="lp_extra")
+        with c_p2: strategy = st.selectbox("추가상환 우선순위", PREPAY_STRATEGIES, key="lp_strategy")
+
+        # 0원 ~ (입력액 x 2) 구간을 100단계로 나눠 전략별로 한 번에 계산
+        grid_max = max(extra_monthly * 2, 1000000)
+        extras = np.unique(np.append(np.linspace(0, grid_max, 100), extra_monthly))
+        t_start = time.perf_counter()
+        sc_extra, sc_order, sc_label = build_prepay_scenarios(loans, extras)
+        result = simulate_prepayment(loans, sc_extra, sc_order)
+        elapsed_ms = (time.perf_counter() - t_start) * 1000
+
+        pick = np.flatnonzero((sc_label == strategy) & (sc_extra == extra_monthly))[0]
+        my_interest = result["total_interest"][pick]
+        my_payoff = result["payoff_month"][pick]
+
+        c_m1, c_m2, c_m3 = st.columns(3)
+        c_m1.metric("기본 총 이자", f"{base_interest:,.0f}원")
+        c_m2.metric("선택 전략 총 이자", f"{my_interest:,.0f}원", delta=f"{my_interest - base_interest:,.0f}원", delta_color="inverse")
+        if my_payoff > horizon:
+            c_m3.metric("전체 상환 완료", f"{horizon // 12}년 이후")
+        else:
+            c_m3.metric("전체 상환 완료", f"{my_payoff // 12}년 {my_payoff % 12}개월 후")
+
+        df_sc = pd.DataFrame({"Extra": sc_extra, "Strategy": sc_label, "Interest": result["total_interest"]})
+        defer_chart(lambda alt: alt.Chart(df_sc).mark_line(size=3).encode(
+            x=alt.X("Extra:Q", title="월 추가상환액 (원)", axis=alt.Axis(format=",d")),
+            y=alt.Y("Interest:Q", title="총 이자 (원)", axis=alt.Axis(format=",d")),
+            color=alt.Color("Strategy:N", title="전략"),
+            tooltip=["Strategy", alt.Tooltip("Extra", format=",.0f"), alt.Tooltip("Interest", format=",.0f")]
+        ).properties(height=300))
+        st.caption(f"⚡ {len(sc_extra)}개 시나리오 계산: {elapsed_ms:,.0f}ms | 먼저 다 갚은 대출의 원래 납입액은 다음 순위 대출에 투입됩니다. | 총 이자는 가장 긴 대출의 만기({horizon // 12}년 {horizon % 12}개월)까지 계산합니다.")
+
+# =========================================================
+# 탭 7: 가격 알림
+# =========================================================
+with tab7:
+    st.subheader("🔔 가격 알림 (백그라운드 감시)")
+    st.caption("시세가 갱신될 때마다 서버가 알아서 점검합니다. 화면을 열어두지 않아도 알림 로그에 기록됩니다.")
+    st.info("💡 알림 설정도 [가족 자산] 탭의 [데이터 저장하기] 버튼을 눌러야 재시작 후에도 유지됩니다.")
+
+    st.markdown("#### 🧮 물타기 사다리")
+    ladders = st.session_state['alert_ladders']
+    if ladders:
+        st.dataframe(pd.DataFrame([
+            {"티커": t, "1회차 매수가": f"${lad['start_price']:,.2f}", "간격": f"-{lad['drop_rate']}%",
+             "분할": f"{lad['split_cnt']}회", "목표 매도가": f"${lad['target']:,.2f}"}
+            for t, lad in ladders.items()
+        ]), hide_index=True, use_container_width=True)
+        if st.button("사다리 알림 모두 해제"):
+            st.session_state['alert_ladders'] = {}
+            st.rerun()
+    else:
+        st.caption("[물타기 시뮬레이터] 탭에서 '이 계획으로 가격 알림 등록'을 눌러 추가하세요.")
+
+    st.markdown("#### 👀 와치리스트 하락 구간")
+    st.text_input("전고점 대비 하락률 (%, 쉼표 구분)", key="alert_dd_levels")
+
+    st.markdown("#### ✏️ 사용자 규칙")
+    c_a1, c_a2, c_a3, c_a4 = st.columns([1, 1, 1, 1])
+    with c_a1: new_t = st.text_input("티커", key="alert_new_t").strip().upper()
+    with c_a2: new_op = st.selectbox("조건", ["이하", "이상"], key="alert_new_op")
+    with c_a3: new_p = st.number_input("가격 ($)", min_value=0.0, value=0.0, step=0.1, key="alert_new_p")
+    with c_a4:
+        st.write("")
+        if st.button("규칙 추가", use_container_width=True) and new_t and new_p > 0:
+            st.session_state['alert_custom'].append({"ticker": new_t, "op": "below" if new_op == "이하" else "above", "price": new_p})
+    if st.session_state['alert_custom']:
+        st.dataframe(pd.DataFrame(st.session_state['alert_custom']), hide_index=True, use_container_width=True)
+        if st.button("사용자 규칙 모두 삭제"):
+            st.session_state['alert_custom'] = []
+            st.rerun()
+
+    st.markdown("#### 📮 알림 받을 곳")
+    webhook = st.text_input("웹훅 URL (선택, 비우면 로그 파일에만 기록)", key="alert_webhook")
+    if webhook:
+        alerts.sinks[("webhook", hh_id)] = make_webhook_sink(webhook, hh_id)
+    else:
+        alerts.sinks.pop(("webhook", hh_id), None)
+
+    alerts.set_source(hh_id, st.session_state)
+    rules = alerts.rules.get(hh_id, [])
+
+    st.divider()
+    c_s1, c_s2, c_s3 = st.columns(3)
+    c_s1.metric("감시 규칙", f"{len(rules)}개")
+    c_s2.metric("감시 티커", f"{len(alerts.tickers())}개")
+    c_s3.metric("마지막 점검", alerts.last_check.strftime("%H:%M:%S") if alerts.last_check else "-")
+
+    st.markdown("#### 📜 최근 알림")
+    recent = read_alert_log(hh_id)
+    if recent:
+        st.dataframe(pd.DataFrame(recent)[["time", "ticker", "label", "price", "source"]].rename(columns={
+            "time": "시각", "ticker": "티커", "label": "내용", "price": "가격 ($)", "source": "구분"
+        }), hide_index=True, use_container_width=True)
+    else:
+        st.caption("아직 발생한 알림이 없습니다.")
+
+# ---------------------------------------------------------
+# [성능] 화면 준비 시간 표시 (재시작 후 첫 요청의 화면 시간 포함 - 워밍업은 그 첫 요청 때 시작됨)
+# ---------------------------------------------------------
+render_sec = time.perf_counter() - SCRIPT_T0
+if market.first_render_sec is None:
+    market.first_render_sec = render_sec
+
+# 본문이 모두 전송된 뒤에야 altair 를 불러와서 차트를 채움
+alt = load_altair()
+for placeholder, build_chart in deferred_charts:
+    try:
+        placeholder.altair_chart(build_chart(alt), use_container_width=True)
+    except Exception as e:
+        placeholder.error(f"차트 오류: {e}")
+chart_sec = time.perf_counter() - SCRIPT_T0 - render_sec
+
+warm_txt = f"첫 요청 후 워밍업 {market.warmup_sec:.1f}s" if market.warmup_sec is not None else "워밍업 진행 중"
+render_status.caption(f"⏱️ 화면 {render_sec:.2f}s + 차트 {chart_sec:.2f}s | 재시작 후 첫 요청 화면 {market.first_render_sec:.2f}s | {warm_txt}")
+snap_cnt, snap_age = market.snapshot_status()
+if snap_cnt:
+    snapshot_notice.info(f"📦 시세 {snap_cnt}개는 서버 재시작 전에 저장해 둔 값입니다 (최대 {snap_age / 3600:.1f}시간 전). 새 시세를 받는 중이니 잠시 후 새로고침하세요.")
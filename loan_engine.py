@@ -0,0 +1,97 @@
+# 대출 상환 엔진 (Streamlit 없이 불러올 수 있도록 app.py 에서 분리 - tests/ 에서 직접 검증)
+import numpy as np
+
+LOAN_TYPES = ["원리금균등", "원금균등", "만기일시"]
+LOAN_HORIZON_MONTHS = 360  # 30년 (전망 그래프 기본 구간)
+LOAN_MAX_MONTHS = 600      # 잔여 기간 입력 상한 (50년)
+PREPAY_STRATEGIES = ["고금리 우선", "소액 우선", "입력 순서"]
+
+def loan_horizon(loans):
+    # 가장 긴 대출의 만기까지 계산해서 총 이자가 중간에 잘리지 않도록 함 (최소 30년)
+    if len(loans["months"]) == 0:
+        return LOAN_HORIZON_MONTHS
+    return max(LOAN_HORIZON_MONTHS, int(loans["months"].max()))
+
+def project_loan_schedule(loans, horizon=None):
+    # 추가 상환이 없을 때의 월별 잔액/이자 (대출 수 x 개월) - 반복문 없이 닫힌 식으로 계산
+    horizon = horizon or loan_horizon(loans)
+    B = loans["balance"][:, None]
+    r = loans["rate"][:, None] / 1200
+    n = loans["months"][:, None]
+    kind = loans["kind"][:, None]
+    k = np.arange(1, horizon + 1)[None, :]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        gn = (1 + r) ** n
+        bal_annuity = np.where(r > 0, B * (gn - (1 + r) ** k) / (gn - 1), B * (1 - k / n))
+    bal_equal = B * (1 - k / n)
+    bal = np.select([kind == 0, kind == 1], [bal_annuity, bal_equal], np.broadcast_to(B, bal_annuity.shape))
+    bal = np.clip(np.where(k < n, bal, 0.0), 0.0, None)
+
+    prev = np.concatenate([B, bal[:, :-1]], axis=1)
+    interest = prev * r
+    return bal, interest
+
+def simulate_prepayment(loans, extra, order, rollover=True, horizon=None):
+    # 여러 추가상환 시나리오를 한 번에 계산 (시나리오 x 대출 배열을 월 단위로 진행)
+    # extra: 시나리오별 월 추가상환액 (S,), order: 시나리오별 상환 우선순위 대출 인덱스 (S, L)
+    # rollover=True 이면 먼저 다 갚은 대출의 (원래 스케줄상) 그 달 정기 납입액을 다음 순위 대출에 투입 (스노우볼)
+    # extra=0 이면 먼저 다 갚는 대출이 없으므로 project_loan_schedule 과 같은 결과가 나옴
+    horizon = horizon or loan_horizon(loans)
+    extra = np.asarray(extra, dtype=float)
+    order = np.asarray(order, dtype=int)
+    S, L = order.shape
+    B0 = loans["balance"]
+    r = loans["rate"] / 1200
+    n = loans["months"]
+    kind = loans["kind"]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        pmt = np.where(r > 0, B0 * r / (1 - (1 + r) ** -n), B0 / n)
+    principal_equal = B0 / n
+    if rollover:
+        sched_bal, sched_int = project_loan_schedule(loans, horizon)
+        sched_prev = np.concatenate([B0[:, None], sched_bal[:, :-1]], axis=1)
+        # 원래 스케줄의 대출별 월 납입액 (L, 개월) - 만기일시는 만기 원금(일시상환분)을 빼고 매달 내던 이자만
+        # (추가상환으로 이미 갚은 원금을 만기 달에 다시 투입하면 같은 돈을 두 번 쓰게 됨)
+        sched_pay = np.where(kind[:, None] == 2, 0.0, sched_prev - sched_bal) + sched_int
+
+    bal = np.tile(B0, (S, 1))
+    total_interest = np.zeros(S)
+    balance_path = np.zeros((S, horizon))
+    for m in range(1, horizon + 1):
+        done_early = bal <= 0  # 이번 달 시작 전에 이미 다 갚은 대출
+        interest = bal * r
+        due_principal = np.where(kind == 0, pmt - interest, np.where(kind == 1, principal_equal, 0.0))
+        due_principal = np.where(m >= n, bal, due_principal)
+        due_principal = np.clip(due_principal, 0.0, bal)
+        bal = bal - due_principal
+        total_interest += interest.sum(axis=1)
+
+        avail = extra + (done_early * sched_pay[:, m - 1]).sum(axis=1) if rollover else extra
+        bal_ord = np.take_along_axis(bal, order, axis=1)
+        ahead = np.cumsum(bal_ord, axis=1) - bal_ord
+        pay_ord = np.clip(avail[:, None] - ahead, 0.0, bal_ord)
+        np.put_along_axis(bal, order, bal_ord - pay_ord, axis=1)
+
+        balance_path[:, m - 1] = bal.sum(axis=1)
+        if not bal.any():
+            break
+
+    paid_off = balance_path <= 0
+    payoff_month = np.where(paid_off.any(axis=1), paid_off.argmax(axis=1) + 1, horizon + 1)
+    return {"total_interest": total_interest, "payoff_month": payoff_month, "balance_path": balance_path}
+
+def build_prepay_scenarios(loans, extras, strategies=PREPAY_STRATEGIES):
+    # (추가상환액 x 우선순위 전략) 조합을 시나리오 배열로 펼침
+    L = len(loans["balance"])
+    orders = {
+        "고금리 우선": np.argsort(-loans["rate"], kind="stable"),
+        "소액 우선": np.argsort(loans["balance"], kind="stable"),
+        "입력 순서": np.arange(L),
+    }
+    extras = np.asarray(extras, dtype=float)
+    extra = np.tile(extras, len(strategies))
+    order = np.vstack([np.tile(orders[s], (len(extras), 1)) for s in strategies])
+    labels = np.repeat(strategies, len(extras))
+    return extra, order, labels
@@ -0,0 +1,51 @@
+import numpy as np
+
+from loan_engine import build_prepay_scenarios, project_loan_schedule, simulate_prepayment
+
+
+def make_loans(balance, rate, months, kind):
+    return {
+        "balance": np.array(balance, dtype=float),
+        "rate": np.array(rate, dtype=float),
+        "months": np.array(months, dtype=float),
+        "kind": np.array(kind, dtype=int),
+    }
+
+
+def test_bullet_balloon_is_not_rolled_over():
+    # 1천만원 24개월 만기일시 + 1억 원리금균등, 월 100만원 추가상환 (만기일시 우선)
+    # 추가상환으로 먼저 다 갚은 만기일시 대출의 만기 원금이 24개월째에 다음 대출로 다시 투입되면 안 됨
+    loans = make_loans([10_000_000, 100_000_000], [5.0, 4.5], [24, 360], [2, 0])
+    order = np.array([[0, 1]])
+    with_roll = simulate_prepayment(loans, [1_000_000], order, rollover=True)
+    without = simulate_prepayment(loans, [1_000_000], order, rollover=False)
+
+    # 다 갚은 뒤 넘어가는 돈은 매달 내던 이자(약 4만원)뿐이라 상환 완료 시점 차이는 1~2개월 이내
+    assert 0 <= without["payoff_month"][0] - with_roll["payoff_month"][0] <= 2
+    # 24개월째 잔액이 1천만원만큼 뚝 떨어지지 않아야 함
+    path = with_roll["balance_path"][0]
+    assert path[22] - path[23] < 2_000_000
+
+
+def test_zero_extra_matches_schedule():
+    # 추가상환 0원 시나리오는 (전략과 상관없이) 기본 스케줄의 총 이자/상환 완료 시점과 같아야 함
+    loans = make_loans(
+        [100_000_000, 30_000_000, 10_000_000, 50_000_000],
+        [4.5, 6.0, 5.0, 3.0],
+        [120, 60, 24, 480],
+        [1, 0, 2, 0],
+    )
+    extra, order, _ = build_prepay_scenarios(loans, [0])
+    result = simulate_prepayment(loans, extra, order)
+    sched_bal, sched_int = project_loan_schedule(loans)
+
+    assert np.allclose(result["total_interest"], sched_int.sum(), rtol=1e-9, atol=1.0)
+    assert (result["payoff_month"] == 480).all()
+    assert np.allclose(result["balance_path"], sched_bal.sum(axis=0), atol=1.0)
+
+
+def test_equal_principal_interest():
+    # 1억 / 4.5% / 120개월 원금균등: 총 이자 22,687,500원
+    loans = make_loans([100_000_000], [4.5], [120], [1])
+    _, sched_int = project_loan_schedule(loans)
+    assert round(sched_int.sum()) == 22_687_500